@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import plotly.graph_objects as go
+from streamlit.runtime.uploaded_file_manager import UploadedFile
 from workflow import (
-    perform_etl_and_scaling, parse_real_gpx, run_fleet_simulation, fast_trip_energy
+    perform_etl_and_scaling, parse_real_gpx, run_fleet_simulation, fast_trip_energy, lttb_indices
 )
 
 # ==========================================
@@ -13,6 +15,22 @@ st.set_page_config(page_title="BEE 5201: Fleet Simulation", layout="wide", initi
 st.title("⚡ BEE 5201: A Fleet Simulation and Techno-Economic Analysis")
 st.markdown("E-BIKE TCO Digital Twin")
 
+# ==========================================
+# CACHED ETL (keyed on uploaded file contents)
+# ==========================================
+UPLOAD_HASH_FUNCS = {UploadedFile: lambda f: (f.name, f.getvalue())}
+
+@st.cache_data(show_spinner=False, max_entries=8, hash_funcs=UPLOAD_HASH_FUNCS)
+def cached_etl_and_scaling(dc_data, bms_data):
+    """perform_etl_and_scaling, memoized on the uploaded files' names and bytes."""
+    return perform_etl_and_scaling(dc_data, bms_data)
+
+@st.cache_data(show_spinner=False, max_entries=8, hash_funcs=UPLOAD_HASH_FUNCS)
+def cached_parse_gpx(gpx_data):
+    """parse_real_gpx, memoized on the uploaded file's name and bytes."""
+    gpx_data.seek(0)
+    return parse_real_gpx(gpx_data)
+
 # ==========================================
 # SIDEBAR: THE CONTROL CENTER
 # ==========================================
@@ -59,8 +77,8 @@ run_sim = st.sidebar.button("🚀 Run Simulation", use_container_width=True, typ
 # ==========================================
 if etl_btn and etl_ready:
     with st.spinner("📥 Extracting Electrochemical DNA and parsing Topography..."):
-        mean_km, std_km, k_lfp, r0_scaled, df_daily_clean, df_bms_clean = perform_etl_and_scaling(dc_file, bms_file)
-        df_route, route_km = parse_real_gpx(gpx_file)
+        mean_km, std_km, k_lfp, r0_scaled, df_daily_clean, df_bms_clean = cached_etl_and_scaling(dc_file, bms_file)
+        df_route, route_km = cached_parse_gpx(gpx_file)
 
         # Cache results in session state
         st.session_state.etl_done = True
@@ -151,13 +169,33 @@ if run_sim and sim_ready:
     rep_sib_baas = fleets["SIB BaaS"][0]
     rep_lfp_baas = fleets["LFP BaaS"][0]
 
+    # One wide frame of Bike 0 telemetry shared by every daily chart
+    df_daily = pd.DataFrame({
+        'Day': rep_sib.log_day,
+        'SIB (SOH %)': rep_sib.log_soh,
+        'LFP (SOH %)': rep_lfp.log_soh,
+        'SIB (Wh/km)': rep_sib.log_wh_km,
+        'LFP (Wh/km)': rep_lfp.log_wh_km,
+        'SIB (Ah)': rep_sib.log_cap,
+        'LFP (Ah)': rep_lfp.log_cap,
+        'SIB Owned': rep_sib.log_cum_tco,
+        'LFP Owned': rep_lfp.log_cum_tco,
+        'SIB BaaS': rep_sib_baas.log_cum_tco,
+        'LFP BaaS': rep_lfp_baas.log_cum_tco
+    })
+
     # 1. Topography
     st.subheader("⛰️ GPX Route Topography (Physics Engine)")
-    fig_topo = px.area(st.session_state.df_route, x='dist_m', y='ele',
-                       labels={'dist_m': 'Distance (m)', 'ele': 'Elevation (m)'})
-    fig_topo.update_layout(yaxis_range=[
-        st.session_state.df_route['ele'].min() - 10,
-        st.session_state.df_route['ele'].max() + 10
+    # px.area has no WebGL mode, so draw the GPX track as a filled Scattergl,
+    # LTTB-downsampled to ~2000 points (more than a chart can resolve anyway)
+    df_route = st.session_state.df_route
+    topo_idx = lttb_indices(df_route['dist_m'].to_numpy(), df_route['ele'].to_numpy(), 2000)
+    fig_topo = go.Figure(go.Scattergl(x=df_route['dist_m'].to_numpy()[topo_idx],
+                                      y=df_route['ele'].to_numpy()[topo_idx],
+                                      mode='lines', fill='tozeroy'))
+    fig_topo.update_layout(xaxis_title='Distance (m)', yaxis_title='Elevation (m)', yaxis_range=[
+        df_route['ele'].min() - 10,
+        df_route['ele'].max() + 10
     ])
     st.plotly_chart(fig_topo, use_container_width=True)
 
@@ -166,12 +204,7 @@ if run_sim and sim_ready:
     # 2. SOH Degradation
     with colA:
         st.subheader("📉 Battery Health (SOH) Fade")
-        df_soh = pd.DataFrame({
-            'Day': rep_sib.log_day,
-            'SIB Owned': rep_sib.log_soh,
-            'LFP Owned': rep_lfp.log_soh
-        })
-        fig_soh = px.line(df_soh, x='Day', y=['SIB Owned', 'LFP Owned'],
+        fig_soh = px.line(df_daily, x='Day', y=['SIB (SOH %)', 'LFP (SOH %)'], render_mode='webgl',
                           labels={'value': 'SOH (%)', 'variable': 'Chemistry'})
         fig_soh.add_hline(y=80, line_dash="dash", line_color="red", annotation_text="End of Life (80%)")
         st.plotly_chart(fig_soh, use_container_width=True)
@@ -179,12 +212,7 @@ if run_sim and sim_ready:
     # 3. Energy Efficiency (SSI Proof)
     with colB:
         st.subheader("⚡ Energy Efficiency (SSI Voltage Sag)")
-        df_eff = pd.DataFrame({
-            'Day': rep_sib.log_day,
-            'SIB (Wh/km)': rep_sib.log_wh_km,
-            'LFP (Wh/km)': rep_lfp.log_wh_km
-        })
-        fig_eff = px.line(df_eff, x='Day', y=['SIB (Wh/km)', 'LFP (Wh/km)'],
+        fig_eff = px.line(df_daily, x='Day', y=['SIB (Wh/km)', 'LFP (Wh/km)'], render_mode='webgl',
                           labels={'value': 'Wh / km consumed'})
         st.plotly_chart(fig_eff, use_container_width=True)
 
@@ -193,26 +221,14 @@ if run_sim and sim_ready:
     # 4. Capacity Ah Fade
     with colC:
         st.subheader("🔋 Capacity Fade (Ah)")
-        df_cap = pd.DataFrame({
-            'Day': rep_sib.log_day,
-            'SIB (Ah)': rep_sib.log_cap,
-            'LFP (Ah)': rep_lfp.log_cap
-        })
-        fig_cap = px.area(df_cap, x='Day', y=['SIB (Ah)', 'LFP (Ah)'],
+        fig_cap = px.area(df_daily, x='Day', y=['SIB (Ah)', 'LFP (Ah)'],
                           labels={'value': 'Available Capacity (Ah)'})
         st.plotly_chart(fig_cap, use_container_width=True)
 
     # 5. Cumulative Cost Breakdown (all 4 models)
     with colD:
         st.subheader("💰 Cumulative TCO Accumulation")
-        df_tco = pd.DataFrame({
-            'Day': rep_sib.log_day,
-            'SIB Owned': rep_sib.log_cum_tco,
-            'LFP Owned': rep_lfp.log_cum_tco,
-            'SIB BaaS': rep_sib_baas.log_cum_tco,
-            'LFP BaaS': rep_lfp_baas.log_cum_tco
-        })
-        fig_tco = px.line(df_tco, x='Day', y=['SIB Owned', 'LFP Owned', 'SIB BaaS', 'LFP BaaS'],
+        fig_tco = px.line(df_daily, x='Day', y=['SIB Owned', 'LFP Owned', 'SIB BaaS', 'LFP BaaS'], render_mode='webgl',
                           labels={'value': 'Total Spend (KSh)'})
         st.plotly_chart(fig_tco, use_container_width=True)
 
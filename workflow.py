@@ -15,11 +15,19 @@ import pandas as pd
 import numpy as np
 import xml.etree.ElementTree as ET
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:  # Numba is optional: simulate_fleet_day falls back to pure NumPy
+    NUMBA_AVAILABLE = False
+
 # ==========================================
 # FIXED PARAMETERS
 # ==========================================
 TARGET_CAP_KWH = 1.44  # Target: 48V 30Ah
 FLEET_SIZE = 25        # 25 bikes per model × 4 models = 100 total fleet
+R_DYN_GAIN = 2.5       # SSI: r_dyn = R0 × (1 + 2.5 × (1 - SOH))
+MAX_DAILY_TRIPS = 20   # Upper clip on stochastic trips per bike per day
 
 # ==========================================
 # FILE I/O
@@ -29,7 +37,11 @@ def read_file(uploaded_file):
     uploaded_file.seek(0)
     name = uploaded_file.name.lower()
     if name.endswith('.csv'):
-        return pd.read_csv(uploaded_file)
+        # Multithreaded Arrow parser (pyarrow ships with Streamlit)
+        return pd.read_csv(uploaded_file, engine='pyarrow')
+    elif name.endswith('.xlsx'):
+        # pandas opens the workbook with openpyxl in read-only, values-only mode
+        return pd.read_excel(uploaded_file, engine='openpyxl')
     else:
         return pd.read_excel(uploaded_file)
 
@@ -84,31 +96,26 @@ def parse_real_gpx(gpx_data):
     Parse a GPX file and compute distance, gradient, and speed profiles.
     Returns: (DataFrame, route_distance_km)
     """
-    tree = ET.parse(gpx_data)
-    ns = {'gpx': 'http://www.topografix.com/GPX/1/1'}
-    data = [
-        {
-            'lat': float(pt.get('lat')),
-            'lon': float(pt.get('lon')),
-            'ele': float(pt.find('gpx:ele', ns).text) if pt.find('gpx:ele', ns) is not None else 0.0
-        }
-        for pt in tree.getroot().findall('.//gpx:trkpt', ns)
-    ]
-    df = pd.DataFrame(data)
-
-    def haversine(lat1, lon1, lat2, lon2):
-        R, phi1, phi2 = 6371000, np.radians(lat1), np.radians(lat2)
-        dphi, dlambda = np.radians(lat2 - lat1), np.radians(lon2 - lon1)
-        a = np.sin(dphi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda / 2) ** 2
-        return 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
-
-    dist = [0.0]
-    for i in range(1, len(df)):
-        dist.append(dist[-1] + haversine(
-            df.iloc[i - 1]['lat'], df.iloc[i - 1]['lon'],
-            df.iloc[i]['lat'], df.iloc[i]['lon']
-        ))
-    df['dist_m'] = dist
+    # Stream trackpoints instead of building the whole DOM; each is cleared once read
+    trkpt_tag = '{http://www.topografix.com/GPX/1/1}trkpt'
+    ele_tag = '{http://www.topografix.com/GPX/1/1}ele'
+    lats, lons, eles = [], [], []
+    for _, elem in ET.iterparse(gpx_data, events=('end',)):
+        if elem.tag == trkpt_tag:
+            ele = elem.find(ele_tag)
+            lats.append(float(elem.get('lat')))
+            lons.append(float(elem.get('lon')))
+            eles.append(float(ele.text) if ele is not None else 0.0)
+            elem.clear()
+    df = pd.DataFrame({'lat': lats, 'lon': lons, 'ele': eles})
+
+    # Vectorised haversine between consecutive trackpoints, then cumulative distance
+    R = 6371000
+    phi, lam = np.radians(df['lat'].to_numpy()), np.radians(df['lon'].to_numpy())
+    dphi, dlambda = np.diff(phi), np.diff(lam)
+    a = np.sin(dphi / 2) ** 2 + np.cos(phi[:-1]) * np.cos(phi[1:]) * np.sin(dlambda / 2) ** 2
+    seg = 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    df['dist_m'] = np.concatenate([[0.0], np.cumsum(seg)])
 
     # Calculate precise hill angles
     delta_dist = np.where(np.diff(df['dist_m']) == 0, 1e-5, np.diff(df['dist_m']))
@@ -119,33 +126,72 @@ def parse_real_gpx(gpx_data):
 
     return df, df['dist_m'].iloc[-1] / 1000.0
 
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling for plotting dense series.
+    Keeps the first and last points and, from each of the n_out - 2 buckets in
+    between, the point forming the largest triangle with the previously kept
+    point and the next bucket's mean.
+    Returns: integer index array of length min(n_out, len(x))
+    """
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    idx = np.empty(n_out, dtype=np.int64)
+    idx[0], idx[-1] = 0, n - 1
+
+    a = 0
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        next_end = edges[b + 2] if b + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + np.argmax(area)
+        idx[b + 1] = a
+
+    return idx
+
 # ==========================================
 # PRE-COMPUTED KINEMATICS ENGINE
 # ==========================================
-def precompute_route_energy_coefficients(df_route, eff_base_wh_km, payload):
+def extract_route_kinematics(df_route):
+    """
+    Materialises the per-segment route arrays once, independent of chemistry and payload.
+    Returns: (v, sin_theta, dt) — speed (m/s), sine of gradient, and segment duration (s)
+    """
+    v = df_route['v_ms'].to_numpy()[1:]
+    sin_theta = np.sin(df_route['grad'].to_numpy()[1:])
+    d = np.diff(df_route['dist_m'].to_numpy())
+    dt = np.where(v > 0, d / v, 0.0)
+    return v, sin_theta, dt
+
+def precompute_route_energy_coefficients(df_route, eff_base_wh_km, payload, kinematics=None):
     """
     Algebraically decomposes the route energy into A, B, C constants.
     Energy(r_dyn) = A + B * r_dyn + C
     This prevents iterating through the GPX array millions of times.
+    Pass `kinematics` from extract_route_kinematics to reuse it across chemistries.
     """
     M, G = payload, 9.81
-    v = df_route['v_ms'].values[1:]
-    theta = df_route['grad'].values[1:]
-    d = np.diff(df_route['dist_m'].values)
-    dt = np.where(v > 0, d / v, 0.0)
+    v, sin_theta, dt = kinematics if kinematics is not None else extract_route_kinematics(df_route)
 
     # Base mechanical power (Watts)
-    P_mech = (M * G * np.sin(theta) * v) + ((eff_base_wh_km * 3.6) * v)
+    P_mech = (M * G * sin_theta * v) + ((eff_base_wh_km * 3.6) * v)
+    P_dt = P_mech * dt  # Segment energy (Joules), shared by all three coefficients
     pos_mask = P_mech > 0
 
     # Coefficient A: Base Mechanical Energy (Joules)
-    A = np.sum(P_mech[pos_mask] * dt[pos_mask])
+    A = np.where(pos_mask, P_dt, 0.0).sum()
 
-    # Coefficient B: I^2 scalar for internal resistance heat loss
-    B = np.sum((P_mech[pos_mask] / 48.0) ** 2 * dt[pos_mask])
+    # Coefficient B: I^2 scalar for internal resistance heat loss, (P/48)^2 * dt
+    B = np.where(pos_mask, P_mech * P_dt, 0.0).sum() / 48.0 ** 2
 
     # Coefficient C: Regenerative braking return
-    C = np.sum(P_mech[~pos_mask] * 0.3 * dt[~pos_mask])
+    C = np.where(pos_mask, 0.0, P_dt).sum() * 0.3
 
     return A, B, C
 
@@ -157,8 +203,17 @@ def fast_trip_energy(A, B, C, r_dyn):
 # DIGITAL TWIN CLASS
 # ==========================================
 class FleetBike:
+    # Fixed attribute layout: no per-instance __dict__, cheaper attribute access
+    __slots__ = (
+        'name', 'r0_base', 'k_coeff', 'p_factor', 'mode', 'swap_fee', 'tariff', 'payload',
+        'anx_min', 'anx_max', 'energy_A', 'energy_B', 'energy_C',
+        'initial_capex', 'capex_amortized', 'opex',
+        'soh', 'soc', 'cum_efc', 'total_km', 'last_wh_km', 'anxiety_threshold',
+        'log_day', 'log_soh', 'log_wh_km', 'log_cap', 'log_cum_tco',
+    )
+
     def __init__(self, name, r0, k, p, capex, swap_fee, mode, tariff, payload,
-                 anx_min, anx_max, energy_coeffs):
+                 anx_min, anx_max, energy_coeffs, anxiety_threshold, sim_days):
         self.name, self.r0_base, self.k_coeff, self.p_factor = name, r0, k, p
         self.mode, self.swap_fee, self.tariff, self.payload = mode, swap_fee, tariff, payload
         self.anx_min, self.anx_max = anx_min / 100.0, anx_max / 100.0
@@ -171,49 +226,150 @@ class FleetBike:
         
         # Physical State Tracking
         self.soh, self.soc, self.cum_efc, self.total_km = 1.0, 1.0, 0.0, 0.0
-        self.anxiety_threshold = np.random.uniform(self.anx_min, self.anx_max)
+        self.last_wh_km = 0.0  # Wh/km of the most recent trip, reused for telemetry
+        self.anxiety_threshold = anxiety_threshold
+
+        # Telemetry Logging (preallocated per day; NaN until the day is logged)
+        self.log_day = np.arange(sim_days, dtype=np.int32)
+        self.log_soh, self.log_wh_km, self.log_cap, self.log_cum_tco = (
+            np.full(sim_days, np.nan, dtype=np.float32) for _ in range(4)
+        )
+
+    def load_state(self, state, i):
+        """Read this bike back out of a Struct-of-Arrays state at index `i`, e.g. (fleet, bike)."""
+        for field in STATE_FIELDS:
+            setattr(self, field, float(state[field][i]))
+
+    def log_daily_stats(self, day, state, i):
+        """Log index `i` of a Struct-of-Arrays state, e.g. (fleet, bike), as this bike's telemetry for `day`."""
+        soh = state['soh'][i]
+        self.log_soh[day] = soh * 100
+        self.log_wh_km[day] = state['last_wh_km'][i]
+        self.log_cap[day] = 30.0 * soh
+        self.log_cum_tco[day] = state['opex'][i] + state['capex_amortized'][i]
+
+# ==========================================
+# VECTORISED FLEET KERNEL (Struct-of-Arrays)
+# ==========================================
+STATE_FIELDS = ('soh', 'soc', 'cum_efc', 'total_km', 'opex', 'capex_amortized',
+                'anxiety_threshold', 'last_wh_km')
+
+def pack_fleet_state(fleets):
+    """
+    Gather the per-bike state of several equally sized fleets into Struct-of-Arrays form.
+    State is float32: ~7 significant digits is ample for SOH/SOC/KSh tracking
+    and halves the memory traffic of the daily kernel.
+    Returns: dict mapping each STATE_FIELDS name to an ndarray of shape (n_fleets, n_bikes)
+    """
+    return {field: np.array([[getattr(b, field) for b in fleet] for fleet in fleets], dtype=np.float32)
+            for field in STATE_FIELDS}
 
-        # Telemetry Logging
-        self.log_day, self.log_soh, self.log_wh_km, self.log_cap, self.log_cum_tco = [], [], [], [], []
+def _kernel_params(models, route_km):
+    """
+    Per-fleet parameters taken from each fleet's Bike 0, as float32 arrays
+    (one entry per fleet) so kernel arithmetic stays in float32.
+    """
+    def column(attr):
+        return np.array([getattr(b, attr) for b in models], dtype=np.float32)
+
+    return (column('energy_A'), column('energy_B'), column('energy_C'),
+            column('r0_base'), column('k_coeff'), column('p_factor'),
+            column('tariff'), column('swap_fee'), column('initial_capex'),
+            np.array([b.mode != "Depot" for b in models]), np.float32(route_km))
+
+if NUMBA_AVAILABLE:
+    @njit(fastmath=True, cache=True)
+    def _simulate_day_jit(soh, soc, cum_efc, opex, capex_amortized, total_km, anx_thr,
+                          last_wh_km, daily_trips, anx_draws, A, B, C, r0_base, k, p,
+                          tariff, swap_fee, initial_capex, is_baas, route_km):
+        """Compiled (fleet, bike) trip loop. Mirrors _simulate_day_numpy."""
+        for m in range(soh.shape[0]):
+            for i in range(soh.shape[1]):
+                for t in range(daily_trips[i]):
+                    r_dyn = r0_base[m] * (1 + (1 - soh[m, i]) * R_DYN_GAIN)
+                    trip_kwh = (A[m] + B[m] * r_dyn + C[m]) / 3600.0 / 1000.0
+                    last_wh_km[m, i] = trip_kwh * 1000.0 / route_km
+                    total_km[m, i] += route_km
+                    efc_this_trip = trip_kwh / TARGET_CAP_KWH
+
+                    if is_baas[m]:
+                        # Branchless swap: selects compile to cmov instead of a mispredicted jump
+                        swap = (soc[m, i] < efc_this_trip + 0.05) | (soc[m, i] < anx_thr[m, i])
+                        soc[m, i] = (1.0 if swap else soc[m, i]) - efc_this_trip
+                        opex[m, i] += swap * swap_fee[m]
+                        anx_thr[m, i] = anx_draws[m, t, i] if swap else anx_thr[m, i]
+                    else:
+                        opex[m, i] += trip_kwh * tariff[m]
+
+                    loss_prev = k[m] * cum_efc[m, i] ** p[m]
+                    cum_efc[m, i] += efc_this_trip
+                    soh[m, i] -= k[m] * cum_efc[m, i] ** p[m] - loss_prev
+
+                    if not is_baas[m]:
+                        capex_amortized[m, i] = min(initial_capex[m],
+                                                    initial_capex[m] * ((1.0 - soh[m, i]) / 0.20))
+
+def _simulate_day_numpy(state, daily_trips, anx_draws, A, B, C, r0_base, k, p,
+                        tariff, swap_fee, initial_capex, is_baas, route_km):
+    """
+    Pure-NumPy fallback for simulate_fleet_day. Per-fleet parameters broadcast as
+    (n_fleets, 1) columns; each pass runs one trip across every fleet at once,
+    masking out bikes that have finished their daily trips.
+    """
+    A, B, C, r0_base, k, p, tariff, swap_fee, initial_capex, is_baas = (
+        x[:, None] for x in (A, B, C, r0_base, k, p, tariff, swap_fee, initial_capex, is_baas)
+    )
+
+    for t in range(daily_trips.max()):
+        active = t < daily_trips  # Trip counts are shared by all fleets
 
-    def process_trip(self, route_km):
         # SSI dynamically increases Ohmic resistance as battery degrades
-        r_dyn = self.r0_base * (1 + (1 - self.soh) * 2.5)
-        
-        trip_kwh = fast_trip_energy(self.energy_A, self.energy_B, self.energy_C, r_dyn) / 1000.0
-        self.total_km += route_km
+        r_dyn = r0_base * (1 + (1 - state['soh']) * R_DYN_GAIN)
+
+        trip_kwh = np.where(active, fast_trip_energy(A, B, C, r_dyn) / 1000.0, 0.0)
+        state['last_wh_km'] = np.where(active, trip_kwh * 1000.0 / route_km, state['last_wh_km'])
+        state['total_km'] += np.where(active, route_km, 0.0)
         efc_this_trip = trip_kwh / TARGET_CAP_KWH
 
-        if self.mode == "Depot":
-            self.opex += trip_kwh * self.tariff # OPEX: KPLC KES/kWh
-            loss_prev = self.k_coeff * (self.cum_efc ** self.p_factor)
-            self.cum_efc += efc_this_trip
-            self.soh -= (self.k_coeff * (self.cum_efc ** self.p_factor) - loss_prev)
-            self.capex_amortized = min(self.initial_capex, self.initial_capex * ((1.0 - self.soh) / 0.20))
-        
-        else: # BaaS Model
-            # Predictive Swap & Range Anxiety Edge Case
-            if self.soc < (efc_this_trip + 0.05) or self.soc < self.anxiety_threshold:
-                self.soc = 1.0
-                self.opex += self.swap_fee # OPEX: BaaS KES/Swap
-                self.anxiety_threshold = np.random.uniform(self.anx_min, self.anx_max)
-            
-            self.soc -= efc_this_trip
-            
-            # BaaS Operator still assumes structural degradation via network EFC throughput
-            loss_prev = self.k_coeff * (self.cum_efc ** self.p_factor)
-            self.cum_efc += efc_this_trip
-            self.soh -= (self.k_coeff * (self.cum_efc ** self.p_factor) - loss_prev)
-
-    def log_daily_stats(self, day, route_km):
-        self.log_day.append(day)
-        self.log_soh.append(self.soh * 100)
-        r_dyn = self.r0_base * (1 + (1 - self.soh) * 2.5)
-        self.log_wh_km.append(
-            fast_trip_energy(self.energy_A, self.energy_B, self.energy_C, r_dyn) / route_km
-        )
-        self.log_cap.append(30.0 * self.soh)
-        self.log_cum_tco.append(self.opex + self.capex_amortized)
+        # Predictive Swap & Range Anxiety Edge Case (BaaS fleets only)
+        swap_mask = is_baas & active & ((state['soc'] < efc_this_trip + 0.05) |
+                                        (state['soc'] < state['anxiety_threshold']))
+        # OPEX: BaaS KES/Swap, Depot KPLC KES/kWh
+        state['opex'] += np.where(is_baas, swap_mask * swap_fee, trip_kwh * tariff)
+        state['soc'] = np.where(swap_mask, 1.0, state['soc']) - efc_this_trip * is_baas
+        state['anxiety_threshold'] = np.where(swap_mask, anx_draws[:, t], state['anxiety_threshold'])
+
+        # All models assume structural degradation via EFC throughput
+        loss_prev = k * (state['cum_efc'] ** p)
+        state['cum_efc'] += efc_this_trip
+        state['soh'] -= (k * (state['cum_efc'] ** p) - loss_prev)
+
+        # BaaS fleets carry no CAPEX, so this stays 0 for them
+        state['capex_amortized'] = np.minimum(
+            initial_capex, initial_capex * ((1.0 - state['soh']) / 0.20))
+
+def simulate_fleet_day(state, models, daily_trips, route_km, anx_draws, day=None, do_log=False):
+    """
+    Advances every bike of every fleet through its trips for a single day.
+    `state` holds (n_fleets, n_bikes) arrays from pack_fleet_state; `models[m]` is
+    fleet m's Bike 0 and supplies that fleet's chemistry and business parameters.
+    `daily_trips[i]` is the trip count of bike i in every fleet and
+    `anx_draws[m, t, i]` its new anxiety threshold if it swaps on trip t.
+    With `do_log`, each Bike 0's end-of-day state is written to its telemetry.
+    Runs the compiled kernel when Numba is installed, otherwise the NumPy fallback.
+    """
+    params = _kernel_params(models, route_km)
+    if NUMBA_AVAILABLE:
+        _simulate_day_jit(state['soh'], state['soc'], state['cum_efc'], state['opex'],
+                          state['capex_amortized'], state['total_km'], state['anxiety_threshold'],
+                          state['last_wh_km'], daily_trips, anx_draws, *params)
+    else:
+        _simulate_day_numpy(state, daily_trips, anx_draws, *params)
+
+    # Sample telemetry from Bike 0 to drive the Streamlit UI charts
+    if do_log:
+        for m, model in enumerate(models):
+            model.log_daily_stats(day, state, (m, 0))
 
 # ==========================================
 # FLEET SIMULATION RUNNER
@@ -221,71 +377,77 @@ class FleetBike:
 def run_fleet_simulation(mean_km, std_km, k_lfp_base, r0_lfp_scaled,
                          df_route, route_km, kplc_tariff, swap_fee,
                          payload_weight, anxiety_min, anxiety_max, env_temp,
-                         sim_days=120, progress_callback=None):
+                         sim_days=120, progress_callback=None, seed=None):
     """
     Executes the macro-stochastic fleet simulation using thermally adjusted parameters.
+    Pass `seed` for a reproducible run.
     """
     # 1. Apply Arrhenius Thermal Stress to the baseline k-coefficients
     k_lfp_thermal = apply_arrhenius_thermal_stress(k_lfp_base, env_temp)
     k_sib_thermal = apply_arrhenius_thermal_stress(k_lfp_base * 1.8, env_temp) # SIB naturally degrades 1.8x faster
 
     # 2. Pre-compute route mechanics ONCE
-    coeffs_sib = precompute_route_energy_coefficients(df_route, 21.0, payload_weight)
-    coeffs_lfp = precompute_route_energy_coefficients(df_route, 18.5, payload_weight)
+    kinematics = extract_route_kinematics(df_route)
+    coeffs_sib = precompute_route_energy_coefficients(df_route, 21.0, payload_weight, kinematics)
+    coeffs_lfp = precompute_route_energy_coefficients(df_route, 18.5, payload_weight, kinematics)
+
+    # 3. Batch-draw every stochastic input up front from a single Generator
+    rng = np.random.default_rng(seed)
+    mean_trips, std_trips = mean_km / route_km, std_km / route_km
+    daily_trips_all = rng.normal(mean_trips, std_trips, (sim_days, FLEET_SIZE)).clip(1, MAX_DAILY_TRIPS).astype(int)
+
+    anx_lo, anx_hi = anxiety_min / 100.0, anxiety_max / 100.0
+    anxiety_init = rng.uniform(anx_lo, anx_hi, (4, FLEET_SIZE))
+    # One replacement threshold per possible swap: (day, model, trip slot, bike)
+    anxiety_pool = rng.uniform(anx_lo, anx_hi, (sim_days, 4, MAX_DAILY_TRIPS, FLEET_SIZE)).astype(np.float32)
 
-    # 3. Initialize the 4 Business Models
+    # 4. Initialize the 4 Business Models
     fleets = {
         "SIB Owned": [
             FleetBike("SIB", r0_lfp_scaled * 1.5, k_sib_thermal, 0.55,
                       20785.0, 0, "Depot", kplc_tariff, payload_weight,
-                      anxiety_min, anxiety_max, coeffs_sib)
-            for _ in range(FLEET_SIZE)
+                      anxiety_min, anxiety_max, coeffs_sib, thr, sim_days)
+            for thr in anxiety_init[0]
         ],
         "LFP Owned": [
             FleetBike("LFP", r0_lfp_scaled, k_lfp_thermal, 0.50,
                       31178.0, 0, "Depot", kplc_tariff, payload_weight,
-                      anxiety_min, anxiety_max, coeffs_lfp)
-            for _ in range(FLEET_SIZE)
+                      anxiety_min, anxiety_max, coeffs_lfp, thr, sim_days)
+            for thr in anxiety_init[1]
         ],
         "SIB BaaS": [
             FleetBike("SIB BaaS", r0_lfp_scaled * 1.5, k_sib_thermal, 0.55,
                       0.0, swap_fee, "BaaS", kplc_tariff, payload_weight,
-                      anxiety_min, anxiety_max, coeffs_sib)
-            for _ in range(FLEET_SIZE)
+                      anxiety_min, anxiety_max, coeffs_sib, thr, sim_days)
+            for thr in anxiety_init[2]
         ],
         "LFP BaaS": [
             FleetBike("LFP BaaS", r0_lfp_scaled, k_lfp_thermal, 0.50,
                       0.0, swap_fee, "BaaS", kplc_tariff, payload_weight,
-                      anxiety_min, anxiety_max, coeffs_lfp)
-            for _ in range(FLEET_SIZE)
+                      anxiety_min, anxiety_max, coeffs_lfp, thr, sim_days)
+            for thr in anxiety_init[3]
         ],
     }
 
-    # 4. Stochastic Daily Iteration
+    # 5. Stochastic Daily Iteration: all 4 fleets advance together as (4, FLEET_SIZE) state
+    models = [fleet[0] for fleet in fleets.values()]
+    state = pack_fleet_state(fleets.values())
+    progress_every = max(1, sim_days // 20)  # ~20 UI updates per run, not one per day
     for day in range(sim_days):
-        mean_trips = mean_km / route_km
-        std_trips = std_km / route_km
-        daily_trips = np.random.normal(mean_trips, std_trips, FLEET_SIZE).clip(1, 20).astype(int)
-
-        for name, fleet in fleets.items():
-            for i, bike in enumerate(fleet):
-                for _ in range(daily_trips[i]):
-                    bike.process_trip(route_km)
-                
-                # Sample telemetry from Bike 0 to drive the Streamlit UI charts
-                if i == 0:
-                    bike.log_daily_stats(day, route_km)
-
-        if progress_callback:
+        simulate_fleet_day(state, models, daily_trips_all[day], route_km,
+                           anxiety_pool[day], day=day, do_log=True)
+
+        if progress_callback and (day % progress_every == 0 or day == sim_days - 1):
             progress_callback((day + 1) / sim_days)
 
-    # 5. Compile Amortized Executive Metrics
-    results = {}
-    for name, fleet in fleets.items():
-        avg_opex = sum(b.opex for b in fleet) / FLEET_SIZE
-        avg_capex = sum(b.capex_amortized for b in fleet) / FLEET_SIZE
-        avg_km = sum(b.total_km for b in fleet) / FLEET_SIZE
-        results[name] = (avg_opex + avg_capex) / avg_km
+    for m, fleet in enumerate(fleets.values()):
+        for i, bike in enumerate(fleet):
+            bike.load_state(state, (m, i))
+
+    # 6. Compile Amortized Executive Metrics (per-fleet reductions over the SoA state)
+    tco_per_km = ((state['opex'].mean(axis=1) + state['capex_amortized'].mean(axis=1))
+                  / state['total_km'].mean(axis=1))
+    results = {name: float(tco_per_km[m]) for m, name in enumerate(fleets)}
 
     best_model = min(results, key=results.get)
     return fleets, results, best_model